@@ -0,0 +1,121 @@
+"""
+Single entry point for the governance tools.
+
+    python -m governance.cli <command> [options]
+
+Each command imports its tool only when it runs, so `--help`, `--dry-run` and
+unrelated commands never pay for elementary, DataHub or boto3.
+"""
+import argparse
+import sys
+
+from governance.src.import_budget import DEFAULT_BUDGET_MS
+
+GMS_SERVER = "http://localhost:8080"
+
+
+def run_report(args):
+    from governance.main_orchestrator import main
+    return main()
+
+
+def run_metadata(args):
+    from governance.src.datahub_metadata import create_hr_metadata
+    create_hr_metadata(gms_server=args.gms_server)
+    print("Successfully emitted HR metadata to DataHub!")
+
+
+def run_lineage(args):
+    from governance.src.datahub_lineage import emit_lineage
+    emit_lineage(args.source, args.destination, gms_server=args.gms_server)
+
+
+def run_domain(args):
+    from governance.src.datahub_domain import assign_domain
+    assign_domain(args.dataset, args.domain, gms_server=args.gms_server)
+
+
+def run_glossary(args):
+    from governance.src.datahub_glossary import associate_glossary_term
+    associate_glossary_term(args.dataset, args.term, gms_server=args.gms_server)
+
+
+def run_delete_asset(args):
+    from governance.src.datahub_delete_asset import soft_delete_asset
+    soft_delete_asset(args.dataset, gms_server=args.gms_server)
+
+
+def run_extract(args):
+    from operations.sf_to_s3 import main, main_scheduler
+    return main_scheduler() if args.all_entities else main()
+
+
+def run_check_imports(args):
+    from governance.src.import_budget import check_import_budget
+    return 0 if check_import_budget(budget_ms=args.budget_ms) else 1
+
+
+DRY_RUN_HELP = "Show what the command would do without importing or connecting to anything."
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="governance", description="Data governance tools.")
+    parser.add_argument('--dry-run', action='store_true', help=DRY_RUN_HELP)
+
+    # Lets --dry-run also follow the command (`governance lineage --dry-run`). SUPPRESS keeps
+    # the subcommand from resetting a --dry-run given before it.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--dry-run', action='store_true', default=argparse.SUPPRESS, help=DRY_RUN_HELP)
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, help_text):
+        return subparsers.add_parser(name, help=help_text, parents=[common])
+
+    report = add_command('report', "Fetch Elementary results and generate the governance report.")
+    report.set_defaults(func=run_report)
+
+    extract = add_command('extract', "Extract SuccessFactors data to S3.")
+    extract.add_argument('--all-entities', action='store_true',
+                         help="Run every [Entity:<name>] section from config.ini concurrently.")
+    extract.set_defaults(func=run_extract)
+
+    datahub_commands = {
+        'metadata': ("Emit HR table schemas, ownership and tags to DataHub.", run_metadata),
+        'lineage': ("Emit lineage between two HR tables.", run_lineage),
+        'domain': ("Place a dataset in a DataHub domain.", run_domain),
+        'glossary': ("Link a glossary term to a dataset.", run_glossary),
+        'delete-asset': ("Soft-delete a dataset in DataHub.", run_delete_asset),
+    }
+    datahub_parsers = {}
+    for name, (help_text, func) in datahub_commands.items():
+        datahub_parsers[name] = add_command(name, help_text)
+        datahub_parsers[name].add_argument('--gms-server', default=GMS_SERVER, help="DataHub GMS URL.")
+        datahub_parsers[name].set_defaults(func=func)
+
+    datahub_parsers['lineage'].add_argument('--source', default="employees")
+    datahub_parsers['lineage'].add_argument('--destination', default="daily_employee_report")
+    datahub_parsers['domain'].add_argument('--dataset', default="hr_db.employees")
+    datahub_parsers['domain'].add_argument('--domain', default="human_resources")
+    datahub_parsers['glossary'].add_argument('--dataset', default="hr_db.employees")
+    datahub_parsers['glossary'].add_argument('--term', default="Personally Identifiable Information")
+    datahub_parsers['delete-asset'].add_argument('--dataset', default="hr_db.old_employees_temp")
+
+    check_imports = add_command('check-imports', "Check that every governance module imports within the time budget.")
+    check_imports.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    check_imports.set_defaults(func=run_check_imports)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.dry_run:
+        options = {k: v for k, v in vars(args).items() if k not in ('func', 'dry_run', 'command')}
+        print(f"[dry run] Would run '{args.command}' with {options}")
+        return 0
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,29 @@
 import yaml
 import os
+import sys
 from governance.src.data_checker import fetch_elementary_results
 from governance.src.document_generator import generate_report
+from governance.src.results_history import open_history, append_run, get_trends
 
 # --- Configuration ---
+# Paths are resolved against this directory so the orchestrator works from any working directory.
+GOVERNANCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # These paths are crucial for dbt and Elementary to find your project and credentials.
-DBT_PROJECT_DIR = os.path.abspath('.') # Assumes you run this from the project root
+DBT_PROJECT_DIR = GOVERNANCE_DIR # The directory containing dbt_project.yml
 DBT_PROFILES_DIR = os.path.expanduser('~/.dbt/') # Default dbt profiles location
 
-RULES_FILE_PATH = 'rules/data_rules.yml'
-REPORT_OUTPUT_PATH = 'docs/data_governance_report.md'
+RULES_FILE_PATH = os.path.join(GOVERNANCE_DIR, 'rules', 'data_rules.yaml')
+REPORT_OUTPUT_PATH = os.path.join(GOVERNANCE_DIR, 'docs', 'data_governance_report.md')
+HISTORY_DB_PATH = os.path.join(GOVERNANCE_DIR, 'data', 'results_history.db')
 
 def main():
     """
     Main function to orchestrate the data governance process by fetching
     live results from Elementary.
+
+    Returns:
+        0 on success, 1 if the process halted before generating the report.
     """
     print("Starting data governance process...")
 
@@ -25,7 +34,7 @@ def main():
         print(f"Successfully loaded documentation rules from {RULES_FILE_PATH}")
     except FileNotFoundError:
         print(f"Error: Rules file not found at {RULES_FILE_PATH}")
-        return
+        return 1
 
     # --- 2. Fetch Live Test Results from Elementary ---
     # This is the key step: we call the function that uses the Elementary SDK
@@ -38,16 +47,27 @@ def main():
 
     if not check_results:
         print("Halting process: No test results were fetched from Elementary.")
-        return
+        return 1
+
+    # --- 3. Append to the Local Results History ---
+    # Every run is kept locally so trend questions ("since when has this test
+    # been failing?") never need another warehouse round trip.
+    history = open_history(HISTORY_DB_PATH)
+    try:
+        append_run(history, check_results)
+        trends = get_trends(history)
+    finally:
+        history.close()
 
-    # --- 3. Generate Documentation Report ---
+    # --- 4. Generate Documentation Report ---
     os.makedirs(os.path.dirname(REPORT_OUTPUT_PATH), exist_ok=True)
     print("Generating governance report from live Elementary results...")
-    generate_report(rules, check_results, REPORT_OUTPUT_PATH)
+    generate_report(rules, check_results, REPORT_OUTPUT_PATH, trends=trends)
     
     print("\nData governance process finished successfully!")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
@@ -1,10 +1,6 @@
 import os
 from datetime import datetime, timedelta
 
-# The elementary-data library provides a DataMonitoring object
-# which is the main entry point for fetching test results.
-from elementary.monitor.data_monitoring import DataMonitoring
-
 def fetch_elementary_results(dbt_project_dir: str, dbt_profiles_dir: str, days_back: int = 1) -> list:
     """
     Connects to the data warehouse using dbt profiles and fetches the latest
@@ -19,6 +15,11 @@ def fetch_elementary_results(dbt_project_dir: str, dbt_profiles_dir: str, days_b
         A list of dictionaries formatted for the documentation generator.
     """
     print("Fetching Elementary test results using the Python SDK...")
+
+    # The elementary-data library provides a DataMonitoring object
+    # which is the main entry point for fetching test results.
+    # It is imported here because it is slow to load and only needed for this call.
+    from elementary.monitor.data_monitoring import DataMonitoring
     
     # Initialize the DataMonitoring object. This object reads your dbt profile
     # to get the credentials for connecting to your data warehouse.
@@ -59,7 +60,11 @@ def fetch_elementary_results(dbt_project_dir: str, dbt_profiles_dir: str, days_b
                 'column': result.column_name,
                 'test_type': result.test_name,
                 'status': 'PASS' if result.status == 'pass' else 'FAIL',
-                'details': result.test_results_description
+                'details': result.test_results_description,
+                # Identify the dbt test execution so the history store can
+                # skip invocations it has already recorded.
+                'invocation_id': getattr(result, 'invocation_id', None),
+                'detected_at': getattr(result, 'detected_at', None),
             })
             
     print(f"Successfully fetched and formatted {len(formatted_results)} test results from Elementary.")
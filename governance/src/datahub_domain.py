@@ -1,25 +1,37 @@
-from datahub.emitter.mce_builder import make_dataset_urn, make_domain_urn
-from datahub.emitter.mcp import MetadataChangeProposalWrapper
-from datahub.emitter.rest_emitter import DatahubRestEmitter
-from datahub.metadata.schema_classes import DomainsClass
-
 # --- Configuration ---
-emitter = DatahubRestEmitter(gms_server="http://localhost:8080")
-dataset_urn = make_dataset_urn("postgres", "hr_db.employees", "PROD")
-
-# --- Define the Domain URN ---
-# Assumes a 'Human Resources' domain exists.
-hr_domain_urn = make_domain_urn("human_resources")
-
-# --- Create the association aspect ---
-domain_aspect = DomainsClass(
-    domains=[hr_domain_urn]
-)
-
-# --- Emit the MCP to place the dataset in the domain ---
-mcp_domain = MetadataChangeProposalWrapper(
-    entityUrn=dataset_urn,
-    aspect=domain_aspect,
-)
-emitter.emit_mcp(mcp_domain)
-print(f"Successfully added '{dataset_urn}' to the '{hr_domain_urn}' domain.")
\ No newline at end of file
+GMS_SERVER = "http://localhost:8080"
+
+
+def assign_domain(dataset_name="hr_db.employees", domain="human_resources", platform="postgres", gms_server=GMS_SERVER):
+    """
+    Places a dataset in a DataHub domain.
+    DataHub libraries are imported here so that loading this module stays cheap.
+    """
+    from datahub.emitter.mce_builder import make_dataset_urn, make_domain_urn
+    from datahub.emitter.mcp import MetadataChangeProposalWrapper
+    from datahub.emitter.rest_emitter import DatahubRestEmitter
+    from datahub.metadata.schema_classes import DomainsClass
+
+    emitter = DatahubRestEmitter(gms_server=gms_server)
+    dataset_urn = make_dataset_urn(platform, dataset_name, "PROD")
+
+    # --- Define the Domain URN ---
+    # Assumes a 'Human Resources' domain exists.
+    hr_domain_urn = make_domain_urn(domain)
+
+    # --- Create the association aspect ---
+    domain_aspect = DomainsClass(
+        domains=[hr_domain_urn]
+    )
+
+    # --- Emit the MCP to place the dataset in the domain ---
+    mcp_domain = MetadataChangeProposalWrapper(
+        entityUrn=dataset_urn,
+        aspect=domain_aspect,
+    )
+    emitter.emit_mcp(mcp_domain)
+    print(f"Successfully added '{dataset_urn}' to the '{hr_domain_urn}' domain.")
+
+
+if __name__ == "__main__":
+    assign_domain()
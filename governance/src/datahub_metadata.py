@@ -1,33 +1,9 @@
-import time
-from datahub.emitter.mce_builder import make_dataset_urn, make_corp_user_urn, make_tag_urn
-from datahub.emitter.mcp import MetadataChangeProposalWrapper
-from datahub.emitter.rest_emitter import DatahubRestEmitter
-from datahub.metadata.schema_classes import (
-    AuditStampClass,
-    ChangeTypeClass,
-    EditableSchemaMetadataClass,
-    EditableSchemaFieldInfoClass,
-    GlobalTagsClass,
-    OwnershipClass,
-    OwnershipTypeClass,
-    OwnerClass,
-    SchemaFieldClass,
-    SchemaFieldDataTypeClass,
-    SchemaMetadataClass,
-    StringTypeClass,
-    NumberTypeClass,
-    TagAssociationClass,
-)
-
 # --- 1. Configuration ---
 
 # This is the URL to your DataHub GMS (General Metadata Service) instance.
 # If you're running DataHub locally using the quickstart guide, it will be http://localhost:8080.
 gms_server = "http://localhost:8080"
 
-# Create an emitter to send metadata to DataHub REST API.
-emitter = DatahubRestEmitter(gms_server=gms_server)
-
 # --- 2. Define HR Metadata ---
 
 # Define the platform and environment for your data assets.
@@ -35,19 +11,39 @@ platform = "postgres"
 environment = "PROD"
 db_name = "hr_db"
 
-# Define owners for the data assets.
-data_owner_urn = make_corp_user_urn("data-steward")
-technical_owner_urn = make_corp_user_urn("data-engineer")
-
-# Define tags for categorization.
-pii_tag_urn = make_tag_urn("pii")
-hr_tag_urn = make_tag_urn("human-resources")
-
 
-def create_hr_metadata():
+def create_hr_metadata(gms_server=gms_server):
     """
     This function creates and emits metadata for the HR tables.
+    DataHub libraries are imported and the emitter is created here, not at
+    module load, so that importing this module stays cheap.
     """
+    from datahub.emitter.mce_builder import make_dataset_urn, make_corp_user_urn, make_tag_urn
+    from datahub.emitter.mcp import MetadataChangeProposalWrapper
+    from datahub.emitter.rest_emitter import DatahubRestEmitter
+    from datahub.metadata.schema_classes import (
+        GlobalTagsClass,
+        OwnershipClass,
+        OwnershipTypeClass,
+        OwnerClass,
+        SchemaFieldClass,
+        SchemaFieldDataTypeClass,
+        SchemaMetadataClass,
+        StringTypeClass,
+        NumberTypeClass,
+        TagAssociationClass,
+    )
+
+    # Create an emitter to send metadata to DataHub REST API.
+    emitter = DatahubRestEmitter(gms_server=gms_server)
+
+    # Define owners for the data assets.
+    data_owner_urn = make_corp_user_urn("data-steward")
+    technical_owner_urn = make_corp_user_urn("data-engineer")
+
+    # Define tags for categorization.
+    pii_tag_urn = make_tag_urn("pii")
+    hr_tag_urn = make_tag_urn("human-resources")
 
     # --- 3. Employees Table Metadata ---
 
@@ -156,7 +152,7 @@ def create_hr_metadata():
             entityUrn=urn,
             aspect=ownership_aspect,
         )
-        emitter.emit_mode(mcp_ownership)
+        emitter.emit_mcp(mcp_ownership)
         print(f"Emitted ownership for {urn}")
 
         # Add global tags.
@@ -169,7 +165,7 @@ def create_hr_metadata():
             entityUrn=urn,
             aspect=tags_aspect,
         )
-        emitter.emit_mode(mcp_tags)
+        emitter.emit_mcp(mcp_tags)
         print(f"Emitted tags for {urn}")
 
 
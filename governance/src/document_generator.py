@@ -1,6 +1,18 @@
 from datetime import datetime
 
-def generate_report(rules_config: dict, test_results: list, output_path: str):
+def format_trend(trend: dict) -> str:
+    """Renders the history of a single test as a short Markdown cell."""
+    if not trend:
+        return "—"
+    parts = []
+    if trend.get('streak'):
+        parts.append(f"Failing since {trend['failing_since'][:10]} ({trend['streak']} runs)")
+    if trend.get('flips'):
+        parts.append(f"⚠️ Flaky ({trend['flips']} flips)")
+    return "<br>".join(parts) or "—"
+
+
+def generate_report(rules_config: dict, test_results: list, output_path: str, trends: dict = None):
     """
     Generates a Markdown report from the rules configuration and test results.
 
@@ -8,6 +20,8 @@ def generate_report(rules_config: dict, test_results: list, output_path: str):
         rules_config: The dictionary loaded from data_rules.yml.
         test_results: A list of dictionaries, where each represents a test result.
         output_path: The file path to save the generated Markdown report.
+        trends: Optional trend data from the results history store, keyed by
+            (table, column, test_type). Adds a Trend column when given.
     """
     
     report_content = []
@@ -33,8 +47,12 @@ def generate_report(rules_config: dict, test_results: list, output_path: str):
         report_content.append(f"\n## Table: `{table_name}`")
         report_content.append(f"_{table.get('description', '')}_\n")
         
-        report_content.append("| Column | Description | Business Rules | Test Status | Details |")
-        report_content.append("|---|---|---|---|---|")
+        if trends is None:
+            report_content.append("| Column | Description | Business Rules | Test Status | Details |")
+            report_content.append("|---|---|---|---|---|")
+        else:
+            report_content.append("| Column | Description | Business Rules | Test Status | Details | Trend |")
+            report_content.append("|---|---|---|---|---|---|")
 
         for column in table['columns']:
             col_name = column['name']
@@ -47,18 +65,23 @@ def generate_report(rules_config: dict, test_results: list, output_path: str):
             if not col_results:
                 status_md = "⚪ N/A"
                 details_md = "No tests found for this column."
-                report_content.append(f"| `{col_name}` | {description} | {rules} | {status_md} | {details_md} |")
+                trend_md = "" if trends is None else " — |"
+                report_content.append(f"| `{col_name}` | {description} | {rules} | {status_md} | {details_md} |{trend_md}")
             else:
                 for i, result in enumerate(col_results):
                     status_emoji = "✅ PASS" if result['status'] == 'PASS' else "❌ FAIL"
                     details = result.get('details', 'No details provided.')
+                    trend_md = ""
+                    if trends is not None:
+                        trend = trends.get((table_name, col_name, result['test_type']))
+                        trend_md = f" {format_trend(trend)} |"
                     
                     # For the first row of a multi-test column, print all info.
                     if i == 0:
-                        report_content.append(f"| `{col_name}` | {description} | {rules} | {status_emoji} ({result['test_type']}) | {details} |")
+                        report_content.append(f"| `{col_name}` | {description} | {rules} | {status_emoji} ({result['test_type']}) | {details} |{trend_md}")
                     # For subsequent rows, only print the test-specific info.
                     else:
-                        report_content.append(f"| | | | {status_emoji} ({result['test_type']}) | {details} |")
+                        report_content.append(f"| | | | {status_emoji} ({result['test_type']}) | {details} |{trend_md}")
 
     # --- Write to File ---
     try:
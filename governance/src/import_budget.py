@@ -0,0 +1,87 @@
+import json
+import os
+import subprocess
+import sys
+
+# Modules that are slow to import and must only be loaded by the command that needs them.
+HEAVY_MODULES = ('elementary', 'datahub', 'boto3', 'botocore')
+
+# Every module reachable from the `governance` CLI before a command runs.
+GOVERNANCE_MODULES = [
+    'governance.cli',
+    'governance.main_orchestrator',
+    'governance.src.data_checker',
+    'governance.src.document_generator',
+    'governance.src.results_history',
+    'governance.src.datahub_metadata',
+    'governance.src.datahub_lineage',
+    'governance.src.datahub_domain',
+    'governance.src.datahub_glossary',
+    'governance.src.datahub_delete_asset',
+    'operations.sf_to_s3',
+]
+
+DEFAULT_BUDGET_MS = 500
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs in a fresh interpreter so that every measurement starts from a cold import cache.
+MEASURE_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed_ms = (time.perf_counter() - start) * 1000
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{'elapsed_ms': elapsed_ms, 'heavy': heavy}}))
+"""
+
+
+def measure_import(module: str) -> dict:
+    """
+    Imports a module in a fresh interpreter and reports how long it took.
+
+    Returns:
+        A dictionary with the import time in milliseconds and the heavy
+        modules that were loaded as a side effect.
+    """
+    snippet = MEASURE_SNIPPET.format(module=module, heavy=HEAVY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, '-c', snippet], cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        stderr_lines = completed.stderr.strip().splitlines()
+        error = stderr_lines[-1] if stderr_lines else f"exited with status {completed.returncode}"
+        return {'elapsed_ms': None, 'heavy': [], 'error': error}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def check_import_budget(budget_ms: float = DEFAULT_BUDGET_MS, modules: list = None) -> bool:
+    """
+    Checks that every governance module imports within the budget and without
+    pulling in any heavy library.
+
+    Args:
+        budget_ms: The maximum import time allowed for each module.
+        modules: The modules to check. Defaults to all governance modules.
+
+    Returns:
+        True if every module is within budget, False otherwise.
+    """
+    within_budget = True
+    print(f"Import time budget: {budget_ms:.0f} ms per module")
+    for module in modules or GOVERNANCE_MODULES:
+        result = measure_import(module)
+        if result.get('error'):
+            within_budget = False
+            print(f"  FAIL {module}: {result['error']}")
+            continue
+        problems = []
+        if result['elapsed_ms'] > budget_ms:
+            problems.append("over budget")
+        if result['heavy']:
+            problems.append(f"eagerly imports {', '.join(result['heavy'])}")
+        status = "FAIL" if problems else "OK  "
+        within_budget = within_budget and not problems
+        suffix = f" ({'; '.join(problems)})" if problems else ""
+        print(f"  {status} {module}: {result['elapsed_ms']:.1f} ms{suffix}")
+    return within_budget
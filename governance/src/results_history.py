@@ -0,0 +1,312 @@
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+# The history store is a local SQLite file. Table, column and test names are
+# dictionary-encoded into the `names` table so each stored result is just a
+# handful of integers, and every trend query is answered from indexes on the
+# local file instead of the Elementary tables in the warehouse.
+#
+# A "run" is one Elementary test invocation, identified by its invocation id
+# (or, when no id is available, by the first detection time of a burst of
+# results), and ordered by when it ran. Fetching the same invocation twice
+# therefore never stores it twice.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    table_id INTEGER NOT NULL REFERENCES names(id),
+    column_id INTEGER NOT NULL REFERENCES names(id),
+    test_type_id INTEGER NOT NULL REFERENCES names(id),
+    UNIQUE (table_id, column_id, test_type_id)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    invocation TEXT NOT NULL UNIQUE,
+    run_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_run_at ON runs (run_at, id);
+CREATE TABLE IF NOT EXISTS results (
+    test_id INTEGER NOT NULL REFERENCES tests(id),
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    passed INTEGER NOT NULL,
+    PRIMARY KEY (test_id, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, test_id, passed);
+CREATE INDEX IF NOT EXISTS idx_results_passed ON results (passed, test_id, run_id);
+"""
+
+# Decodes a test id back into the (table, column, test_type) key used by the report.
+TEST_KEY_SQL = """
+SELECT t.id, tn.name, cn.name, yn.name
+FROM tests t
+JOIN names tn ON tn.id = t.table_id
+JOIN names cn ON cn.id = t.column_id
+JOIN names yn ON yn.id = t.test_type_id
+"""
+
+# Results without an invocation id that were detected within this gap of each
+# other are treated as one dbt test invocation.
+INVOCATION_GAP = timedelta(minutes=30)
+
+
+def open_history(db_path: str) -> sqlite3.Connection:
+    """
+    Opens (and creates, if needed) the local test result history store.
+
+    Args:
+        db_path: The path to the SQLite file holding the history.
+
+    Returns:
+        An open connection with the history schema in place.
+    """
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _name_id(conn: sqlite3.Connection, cache: dict, name) -> int:
+    # Table-level tests have no column; store them under the empty name.
+    name = name or ''
+    if name not in cache:
+        conn.execute("INSERT OR IGNORE INTO names (name) VALUES (?)", (name,))
+        cache[name] = conn.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()[0]
+    return cache[name]
+
+
+def _as_timestamp(value) -> str:
+    # Normalize to one ISO format so timestamps sort correctly as text.
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return str(value)
+    return value.isoformat(timespec='seconds')
+
+
+def _parse_timestamp(run_at: str):
+    try:
+        return datetime.fromisoformat(run_at)
+    except ValueError:
+        return None
+
+
+def _group_by_invocation(test_results: list, fallback_run_at: datetime) -> dict:
+    """
+    Groups results by the Elementary invocation that produced them. Within an
+    invocation only the most recently detected result of each test is kept.
+
+    Results without an invocation id are grouped into bursts: consecutive
+    detection times no more than `INVOCATION_GAP` apart form one run, keyed by
+    the burst's first detection time. Results with neither an id nor a
+    detection time fall back to a single run at `fallback_run_at`.
+    """
+    fallback = _as_timestamp(fallback_run_at)
+    keyed = []
+    unkeyed = []
+    for result in test_results:
+        detected_at = result.get('detected_at')
+        run_at = _as_timestamp(detected_at) if detected_at else fallback
+        if result.get('invocation_id'):
+            keyed.append((result['invocation_id'], run_at, result))
+        else:
+            unkeyed.append((run_at, result))
+
+    burst_key = burst_end = None
+    for run_at, result in sorted(unkeyed, key=lambda item: item[0]):
+        detected = _parse_timestamp(run_at)
+        if burst_key is None or detected is None or burst_end is None or detected - burst_end > INVOCATION_GAP:
+            burst_key = run_at
+        burst_end = detected
+        keyed.append((f"detected:{burst_key}", run_at, result))
+
+    invocations = {}
+    for invocation, run_at, result in keyed:
+        run = invocations.setdefault(invocation, {'run_at': run_at, 'results': {}})
+        run['run_at'] = max(run['run_at'], run_at)
+        key = (result.get('table'), result.get('column'), result.get('test_type'))
+        previous = run['results'].get(key)
+        if previous is None or run_at >= previous[0]:
+            run['results'][key] = (run_at, result['status'] == 'PASS')
+    return invocations
+
+
+def append_run(conn: sqlite3.Connection, test_results: list, run_at: datetime = None) -> int:
+    """
+    Appends the results of the Elementary invocations in `test_results` to the
+    history store, skipping invocations that are already stored.
+
+    Args:
+        conn: A connection returned by `open_history`.
+        test_results: The list of dictionaries returned by `fetch_elementary_results`.
+        run_at: The execution time to use for results that carry neither an
+            invocation id nor a detection time. Defaults to now.
+
+    Returns:
+        The number of test results actually stored.
+    """
+    invocations = _group_by_invocation(test_results, run_at or datetime.now())
+    name_cache = {}
+    stored = skipped = 0
+    with conn:
+        for invocation, run in sorted(invocations.items(), key=lambda item: item[1]['run_at']):
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO runs (invocation, run_at) VALUES (?, ?)", (invocation, run['run_at'])
+            )
+            if not cursor.rowcount:
+                skipped += 1
+                continue
+            run_id = cursor.lastrowid
+            rows = []
+            for (table, column, test_type), (_, passed) in run['results'].items():
+                key = (
+                    _name_id(conn, name_cache, table),
+                    _name_id(conn, name_cache, column),
+                    _name_id(conn, name_cache, test_type),
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO tests (table_id, column_id, test_type_id) VALUES (?, ?, ?)", key
+                )
+                test_id = conn.execute(
+                    "SELECT id FROM tests WHERE table_id = ? AND column_id = ? AND test_type_id = ?", key
+                ).fetchone()[0]
+                rows.append((test_id, run_id, int(passed)))
+            conn.executemany("INSERT INTO results (test_id, run_id, passed) VALUES (?, ?, ?)", rows)
+            stored += len(rows)
+    print(f"Stored {stored} test results from {len(invocations) - skipped} new test run(s) in the history store "
+          f"({skipped} already stored).")
+    return stored
+
+
+def get_failure_streaks(conn: sqlite3.Connection) -> dict:
+    """
+    Finds every test that has been failing since its last passing run.
+
+    Returns:
+        A dictionary keyed by (table, column, test_type) with the number of
+        consecutive failing runs and the execution time of the first failure
+        in the streak.
+    """
+    query = f"""
+        WITH timeline AS (
+            SELECT r.test_id, r.passed, runs.run_at
+            FROM results r
+            JOIN runs ON runs.id = r.run_id
+        ),
+        last_pass AS (
+            SELECT test_id, MAX(run_at) AS run_at FROM timeline WHERE passed = 1 GROUP BY test_id
+        ),
+        streaks AS (
+            SELECT t.test_id, COUNT(*) AS streak, MIN(t.run_at) AS failing_since
+            FROM timeline t
+            LEFT JOIN last_pass lp ON lp.test_id = t.test_id
+            WHERE t.passed = 0 AND (lp.run_at IS NULL OR t.run_at > lp.run_at)
+            GROUP BY t.test_id
+        )
+        SELECT k.*, s.streak, s.failing_since
+        FROM streaks s
+        JOIN ({TEST_KEY_SQL}) k ON k.id = s.test_id
+    """
+    return {
+        (table, column or None, test_type): {'streak': streak, 'failing_since': failing_since}
+        for _, table, column, test_type, streak, failing_since in conn.execute(query)
+    }
+
+
+def get_first_failure(conn: sqlite3.Connection, table: str, column: str, test_type: str):
+    """
+    Answers "since when has this test been failing".
+
+    Returns:
+        The execution time of the first failure in the current failing streak,
+        or None if the test passed in its latest run or is unknown.
+    """
+    test = conn.execute(
+        """
+        SELECT t.id
+        FROM tests t
+        JOIN names tn ON tn.id = t.table_id AND tn.name = ?
+        JOIN names cn ON cn.id = t.column_id AND cn.name = ?
+        JOIN names yn ON yn.id = t.test_type_id AND yn.name = ?
+        """,
+        (table, column or '', test_type),
+    ).fetchone()
+    if test is None:
+        return None
+    # Both lookups are index searches on (passed, test_id) for this test only.
+    row = conn.execute(
+        """
+        SELECT MIN(runs.run_at)
+        FROM results r
+        JOIN runs ON runs.id = r.run_id
+        WHERE r.test_id = :test_id AND r.passed = 0 AND runs.run_at > COALESCE((
+            SELECT MAX(pass_runs.run_at)
+            FROM results p
+            JOIN runs pass_runs ON pass_runs.id = p.run_id
+            WHERE p.test_id = :test_id AND p.passed = 1
+        ), '')
+        """,
+        {'test_id': test[0]},
+    ).fetchone()
+    return row[0]
+
+
+def get_flaky_tests(conn: sqlite3.Connection, window: int = 30, min_flips: int = 2) -> dict:
+    """
+    Finds tests whose status flipped between PASS and FAIL repeatedly.
+
+    Args:
+        conn: A connection returned by `open_history`.
+        window: How many of the most recent runs to consider.
+        min_flips: The minimum number of status changes for a test to count as flaky.
+
+    Returns:
+        A dictionary keyed by (table, column, test_type) with the number of flips.
+    """
+    query = f"""
+        WITH recent_runs AS (
+            SELECT id, run_at FROM runs ORDER BY run_at DESC, id DESC LIMIT ?
+        ),
+        recent AS (
+            SELECT r.test_id, r.passed,
+                   LAG(r.passed) OVER (PARTITION BY r.test_id ORDER BY rr.run_at, rr.id) AS previous
+            FROM results r
+            JOIN recent_runs rr ON rr.id = r.run_id
+        ),
+        flips AS (
+            SELECT test_id, SUM(passed != previous) AS flips
+            FROM recent
+            WHERE previous IS NOT NULL
+            GROUP BY test_id
+            HAVING flips >= ?
+        )
+        SELECT k.*, f.flips
+        FROM flips f
+        JOIN ({TEST_KEY_SQL}) k ON k.id = f.test_id
+    """
+    return {
+        (table, column or None, test_type): flips
+        for _, table, column, test_type, flips in conn.execute(query, (window, min_flips))
+    }
+
+
+def get_trends(conn: sqlite3.Connection, window: int = 30, min_flips: int = 2) -> dict:
+    """
+    Combines failure streaks and flakiness into the trend data used by the report.
+
+    Returns:
+        A dictionary keyed by (table, column, test_type) with `streak`,
+        `failing_since` and `flips` entries for every test that has a trend worth showing.
+    """
+    trends = {}
+    for key, streak in get_failure_streaks(conn).items():
+        trends[key] = dict(streak, flips=0)
+    for key, flips in get_flaky_tests(conn, window=window, min_flips=min_flips).items():
+        trends.setdefault(key, {'streak': 0, 'failing_since': None})['flips'] = flips
+    return trends
@@ -1,12 +1,17 @@
 import configparser
 import requests
-import boto3
 import json
 import logging
 import time
 import os
-from functools import wraps
+import sys
+import argparse
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, wraps
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 
 # --- Configuration ---
 # Configure logging to provide informative output
@@ -41,6 +46,76 @@ def clear_job_state(file_path):
         logging.info(f"Clearing job state file {file_path}.")
         os.remove(file_path)
 
+def entity_state_file(state_file, entity_name):
+    """Derives an independent state file per entity, e.g. job_state.EmpJob.json."""
+    base, ext = os.path.splitext(state_file)
+    return f"{base}.{entity_name}{ext}"
+
+# --- Shared Connection Resources ---
+
+def get_boto3():
+    """Imports boto3 on first use; it is slow to load and not needed for --help or a dry run."""
+    import boto3
+    return boto3
+
+def is_retryable_error(error):
+    """
+    Tells whether an error is a transient network or AWS failure worth retrying.
+    A Boto3Error can only have been raised if boto3 is already imported, so the
+    check never imports boto3 itself.
+    """
+    if isinstance(error, requests.exceptions.RequestException):
+        return True
+    boto3 = sys.modules.get('boto3')
+    return boto3 is not None and isinstance(error, boto3.exceptions.Boto3Error)
+class RateLimiter:
+    """
+    A thread-safe token bucket shared by all extraction threads so that the
+    combined request rate stays within the SuccessFactors API limits.
+    """
+    def __init__(self, requests_per_second, burst=None):
+        self.rate = float(requests_per_second)
+        self.capacity = float(burst or max(1, requests_per_second))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def pause(self, seconds):
+        """
+        Stops every thread from sending for `seconds`, e.g. after a 429 with
+        Retry-After, and drains the bucket so they resume at the steady rate.
+        """
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            # Refilling restarts only once the pause is over.
+            self.updated_at = self.paused_until
+            self.tokens = 0.0
+
+    def acquire(self):
+        """Blocks until a request may be sent."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def create_sf_session(pool_size):
+    """Creates one HTTP session whose connection pool is shared by all extraction threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 # --- Decorators for Resiliency ---
 
 def retry_with_backoff(retries=5, backoff_in_seconds=1):
@@ -54,7 +129,9 @@ def retry_with_backoff(retries=5, backoff_in_seconds=1):
             while attempts < retries:
                 try:
                     return f(*args, **kwargs)
-                except (requests.exceptions.RequestException, boto3.exceptions.Boto3Error) as e:
+                except Exception as e:
+                    if not is_retryable_error(e):
+                        raise
                     attempts += 1
                     if attempts >= retries:
                         logging.error(f"Function '{f.__name__}' failed after {retries} attempts. Giving up.")
@@ -96,22 +173,29 @@ def get_sf_access_token(config):
     logging.info("Successfully obtained access token.")
     return token_data['access_token']
 
-def fetch_sf_data_in_chunks(config, access_token, start_url=None):
+def fetch_sf_data_in_chunks(config, access_token, start_url=None, entity_name=None, select_fields=None,
+                            session=None, rate_limiter=None):
     """
     Fetches data from SuccessFactors, handling pagination and retries.
     This function acts as a generator, yielding data and the URL for the next page.
+
+    When `entity_name` is omitted the single entity configured in the
+    [SuccessFactors] section is fetched. `session` and `rate_limiter` let the
+    scheduler share one connection pool and one request budget across entities.
     """
     max_retries = config.getint('ETL_Process', 'max_retries')
     backoff_factor = config.getfloat('ETL_Process', 'backoff_factor')
+    http = session or requests
 
     if start_url:
         next_url = start_url
         logging.info(f"Resuming data fetch from saved URL: {next_url}")
     else:
         api_base_url = config.get('SuccessFactors', 'api_base_url')
-        entity = config.get('SuccessFactors', 'entity_name')
-        select_fields = config.get('SuccessFactors', 'select_fields', fallback=None)
-        next_url = f"{api_base_url}/odata/v2/{entity}"
+        if entity_name is None:
+            entity_name = config.get('SuccessFactors', 'entity_name')
+            select_fields = config.get('SuccessFactors', 'select_fields', fallback=None)
+        next_url = f"{api_base_url}/odata/v2/{entity_name}"
         
     headers = {'Authorization': f'Bearer {access_token}', 'Accept': 'application/json'}
     params = {'$format': 'json'}
@@ -121,25 +205,31 @@ def fetch_sf_data_in_chunks(config, access_token, start_url=None):
     page_num = 1
     
     while next_url:
-        logging.info(f"Fetching page {page_num}...")
+        logging.info(f"Fetching page {page_num} of {entity_name or 'resumed entity'}...")
         
         attempt = 0
         success = False
         while attempt < max_retries and not success:
             try:
-                response = requests.get(next_url, headers=headers, params=params, timeout=60)
-                params = None  # Params are only needed for the first request
+                if rate_limiter:
+                    rate_limiter.acquire()
+                response = http.get(next_url, headers=headers, params=params, timeout=60)
                 
                 # Handle API rate limiting
                 if response.status_code == 429:
                     retry_after = int(response.headers.get('Retry-After', 30))
                     logging.warning(f"Rate limit hit. Waiting for {retry_after} seconds.")
-                    time.sleep(retry_after)
+                    if rate_limiter:
+                        # Make every thread sharing the limiter back off, not just this one.
+                        rate_limiter.pause(retry_after)
+                    else:
+                        time.sleep(retry_after)
                     # Continue to next attempt without incrementing, as this is a controlled wait
                     continue
 
                 response.raise_for_status()
                 data = response.json()
+                params = None  # Params are only needed for the first request
                 success = True
                 
             except requests.exceptions.RequestException as e:
@@ -195,66 +285,362 @@ def upload_chunk_to_s3(s3_client, chunk_data, bucket, key, dead_letter_key):
         logging.warning(f"Uploading {len(bad_records)} malformed records to s3://{bucket}/{dead_letter_key}...")
         s3_client.put_object(Bucket=bucket, Key=dead_letter_key, Body=body_bytes_bad, ContentType='application/jsonl+json')
 
+# --- PII Masking ---
+
+MASKING_METHODS = ('hash', 'mask_email', 'redact')
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RULES_PATH = os.path.join('governance', 'rules', 'data_rules.yaml')
+
+def parse_field_map(value):
+    """Parses `rule_column:sourceField` pairs, e.g. "first_name:firstName, email:emailAddress"."""
+    field_map = {}
+    for pair in (value or '').split(','):
+        if not pair.strip():
+            continue
+        column, sep, field = pair.partition(':')
+        if not sep or not column.strip() or not field.strip():
+            raise ValueError(f"Invalid pii_field_map entry '{pair.strip()}'. Expected 'rule_column:sourceField'.")
+        field_map[column.strip()] = field.strip()
+    return field_map
+
+def load_pii_columns(rules_path, table_name):
+    """Reads the `pii` masking method of each column of a table from data_rules.yaml."""
+    import yaml
+    with open(rules_path, 'r') as f:
+        rules = yaml.safe_load(f)
+    for table in rules.get('tables', []):
+        if table['name'] == table_name:
+            return {column['name']: column['pii'] for column in table.get('columns', []) if column.get('pii')}
+    logging.warning(f"Table '{table_name}' not found in {rules_path}. No PII columns loaded from rules.")
+    return {}
+
+def load_pii_columns_from_datahub(gms_server, dataset_name, method='hash', platform='postgres'):
+    """Finds the fields of a DataHub dataset that carry the `pii` tag and masks them with `method`."""
+    from datahub.emitter.mce_builder import make_dataset_urn, make_tag_urn
+    from datahub.ingestion.graph.client import DataHubGraph, DatahubClientConfig
+    from datahub.metadata.schema_classes import SchemaMetadataClass
+
+    graph = DataHubGraph(DatahubClientConfig(server=gms_server))
+    schema = graph.get_aspect(make_dataset_urn(platform, dataset_name, 'PROD'), SchemaMetadataClass)
+    pii_tag_urn = make_tag_urn('pii')
+    columns = {}
+    for field in (schema.fields if schema else []):
+        tags = field.globalTags.tags if field.globalTags else []
+        if any(tag.tag == pii_tag_urn for tag in tags):
+            columns[field.fieldPath] = method
+    return columns
+
+def load_masking_columns(config, section='SuccessFactors'):
+    """
+    Builds the {source_field: method} masking plan for one entity. Columns tagged
+    `pii` in DataHub get the default method; `pii` entries in data_rules.yaml
+    override them. Rule and DataHub column names are translated to the field
+    names SuccessFactors returns through `pii_field_map`, e.g.
+
+        pii_field_map = first_name:firstName, last_name:lastName, email:emailAddress
+
+    `rules_table`, `datahub_dataset` and `pii_field_map` describe one entity, so
+    they are read from its own section only ([SuccessFactors] or [Entity:<name>]),
+    never inherited from [Masking]. When the section sets `select_fields`, PII
+    columns the $select leaves out are never fetched and are dropped from the plan.
+    `rules_path` defaults to governance/rules/data_rules.yaml; relative paths are
+    resolved against the repository root.
+    """
+    if not config.getboolean('Masking', 'enabled', fallback=False):
+        return {}
+
+    def option(name):
+        return config.get(section, name, fallback=None)
+
+    columns = {}
+    datahub_dataset = option('datahub_dataset')
+    if datahub_dataset:
+        columns.update(load_pii_columns_from_datahub(
+            config.get('Masking', 'gms_server', fallback='http://localhost:8080'), datahub_dataset,
+            method=config.get('Masking', 'default_method', fallback='hash')
+        ))
+    rules_table = option('rules_table')
+    if rules_table:
+        rules_path = config.get('Masking', 'rules_path', fallback=DEFAULT_RULES_PATH)
+        columns.update(load_pii_columns(os.path.join(PROJECT_ROOT, rules_path), rules_table))
+
+    field_map = parse_field_map(option('pii_field_map'))
+    columns = {field_map.get(column, column): method for column, method in columns.items()}
+
+    select_fields = option('select_fields')
+    if select_fields:
+        selected = {field.strip() for field in select_fields.split(',')}
+        not_selected = sorted(column for column in columns if column not in selected)
+        if not_selected:
+            logging.info(f"PII columns not in $select for {section}, so never fetched: {', '.join(not_selected)}")
+        columns = {column: method for column, method in columns.items() if column in selected}
+
+    unknown = {method for method in columns.values() if method not in MASKING_METHODS}
+    if unknown:
+        raise ValueError(f"Unknown masking method(s) {sorted(unknown)}. Expected one of {MASKING_METHODS}.")
+    logging.info(f"PII masking for {section}: {columns or 'no PII columns found'}")
+    return columns
+
+def create_maskers(config):
+    """
+    Creates the masking functions shared by every entity. Hashes are keyed with
+    the secret from the environment variable named by [Masking] key_env_var, so
+    they are deterministic across runs (joins still work) but not reversible by
+    hashing guessed values. Results are cached because names and emails repeat
+    heavily across pages and entities. Nested values such as OData navigation
+    properties are hashed in their JSON form, so only strings reach the cache.
+    """
+    key_env_var = config.get('Masking', 'key_env_var', fallback='PII_MASKING_KEY')
+    secret = os.environ.get(key_env_var)
+    if not secret:
+        raise ValueError(f"PII masking is enabled but the environment variable '{key_env_var}' is not set.")
+    # blake2b accepts at most a 64-byte key, so normalize any secret to 32 bytes.
+    key = hashlib.sha256(secret.encode('utf-8')).digest()
+    cache_size = config.getint('Masking', 'cache_size', fallback=1_000_000)
+
+    @lru_cache(maxsize=cache_size)
+    def cached_hash(text):
+        return hashlib.blake2b(text.encode('utf-8'), key=key, digest_size=16).hexdigest()
+
+    @lru_cache(maxsize=cache_size)
+    def cached_email(text):
+        local, at, domain = text.rpartition('@')
+        if not at:
+            return cached_hash(text)
+        return f"{cached_hash(local)}@{domain}"
+
+    def as_text(value):
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, sort_keys=True, default=str)
+        return str(value)
+
+    def keyed_hash(value):
+        return cached_hash(as_text(value))
+
+    def mask_email(value):
+        if isinstance(value, (dict, list)):
+            return cached_hash(as_text(value))
+        return cached_email(str(value))
+
+    def redact(value):
+        return None
+
+    return {'hash': keyed_hash, 'mask_email': mask_email, 'redact': redact}
+
+def mask_records(records, pii_columns, maskers):
+    """
+    Masks a chunk in place, one column at a time so each masker runs as a tight loop.
+    Raises ValueError if a PII column appears in none of the records: that almost
+    always means the rule column is not mapped to the right source field, and
+    uploading would leak the real field unmasked.
+    """
+    for column, method in pii_columns.items():
+        mask = maskers[method]
+        seen = False
+        for record in records:
+            if column not in record:
+                continue
+            seen = True
+            value = record[column]
+            if value is not None:
+                record[column] = mask(value)
+        if records and not seen:
+            raise ValueError(
+                f"PII column '{column}' is missing from every record in the chunk. "
+                "Map it to the source field with pii_field_map."
+            )
+    return records
+
+# --- Extraction of a Single Entity ---
+
+def run_entity_extraction(config, entity_name, access_token, s3_client, state_file, select_fields=None,
+                          session=None, rate_limiter=None, pii_columns=None, maskers=None):
+    """
+    Extracts one entity to S3, resuming from and maintaining its own state file.
+    When `pii_columns` is given, each chunk is masked before it is uploaded.
+    Raises on failure, leaving the state file in place for the next run.
+
+    Returns:
+        The total number of records processed for the entity.
+    """
+    s3_bucket = config.get('AWS', 's3_bucket')
+    s3_prefix = config.get('AWS', 's3_prefix', fallback='successfactors-data')
+
+    job_state = load_job_state(state_file)
+    start_url = job_state.get('next_url') if job_state else None
+    chunk_number = job_state.get('chunk_number', 1) if job_state else 1
+    total_records = job_state.get('total_records', 0) if job_state else 0
+
+    timestamp = datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')
+    data_generator = fetch_sf_data_in_chunks(
+        config, access_token, start_url=start_url, entity_name=entity_name, select_fields=select_fields,
+        session=session, rate_limiter=rate_limiter
+    )
+
+    for chunk, next_url in data_generator:
+        # Mask before anything else, so a masking error stops the job before
+        # the state moves past this chunk.
+        if pii_columns:
+            mask_records(chunk, pii_columns, maskers)
+
+        # State should point to the NEXT chunk to be processed.
+        # Save state *before* processing to ensure we can resume if the upload fails.
+        current_state = {
+            'next_url': next_url,
+            'chunk_number': chunk_number + 1,
+            'total_records': total_records + len(chunk)
+        }
+        if next_url:
+            save_job_state(current_state, state_file)
+        else:
+            # If there's no next_url, this is the last chunk.
+            # We will clear the state file upon successful upload.
+            pass
+
+        s3_key = f"{s3_prefix}/{entity_name}/{timestamp}_part_{chunk_number:04d}.jsonl"
+        dead_letter_key = f"{s3_prefix}/{entity_name}/dead-letter/{timestamp}_part_{chunk_number:04d}.jsonl"
+
+        upload_chunk_to_s3(s3_client, chunk, s3_bucket, s3_key, dead_letter_key)
+
+        total_records += len(chunk)
+        chunk_number += 1
+
+    # On successful completion of the entire entity, clear the state file.
+    clear_job_state(state_file)
+    return total_records
+
+# --- Multi-Entity Scheduling ---
+
+def load_entity_jobs(config):
+    """
+    Reads one [Entity:<name>] section per entity from the config, e.g.
+
+        [Entity:EmpJob]
+        priority = 1
+        estimated_rows = 800000
+        select_fields = userId,jobCode
+
+    Jobs are ordered largest first (longest-processing-time-first), which keeps
+    the makespan close to the duration of the largest entity. Priority (lower
+    runs first) only breaks ties between entities of equal size.
+    """
+    jobs = []
+    for section in config.sections():
+        if not section.startswith('Entity:'):
+            continue
+        jobs.append({
+            'entity_name': section.split(':', 1)[1].strip(),
+            'priority': config.getint(section, 'priority', fallback=100),
+            'estimated_rows': config.getint(section, 'estimated_rows', fallback=0),
+            'select_fields': config.get(section, 'select_fields', fallback=None),
+        })
+    jobs.sort(key=lambda job: (-job['estimated_rows'], job['priority']))
+    return jobs
+
+def main_scheduler():
+    """
+    Extracts every configured entity in one process, sharing a single access
+    token, HTTP connection pool, S3 client and rate limiter between threads.
+
+    Returns:
+        0 if every entity finished, 1 if setup or any entity failed.
+    """
+    logging.info("--- Starting SuccessFactors to S3 Multi-Entity ETL Job ---")
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+
+    state_file = config.get('ETL_Process', 'state_file_path')
+    max_workers = config.getint('Scheduler', 'max_workers', fallback=8)
+    requests_per_second = config.getfloat('Scheduler', 'requests_per_second', fallback=10)
+
+    jobs = load_entity_jobs(config)
+    if not jobs:
+        logging.error("No [Entity:<name>] sections found in config.ini. Nothing to schedule.")
+        return 1
+
+    try:
+        masking_plans = {job['entity_name']: load_masking_columns(config, f"Entity:{job['entity_name']}") for job in jobs}
+        maskers = create_maskers(config) if any(masking_plans.values()) else None
+
+        access_token = get_sf_access_token(config)
+        s3_client = get_boto3().client('s3')
+    except Exception as e:
+        logging.critical(f"Could not set up the multi-entity ETL job: {e}", exc_info=True)
+        logging.critical("--- Multi-Entity ETL Job Failed ---")
+        return 1
+
+    session = create_sf_session(max_workers)
+    rate_limiter = RateLimiter(requests_per_second)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sf-extract') as executor:
+        # Jobs are submitted largest first; the pool starts them in that order.
+        futures = {
+            executor.submit(
+                run_entity_extraction, config, job['entity_name'], access_token, s3_client,
+                entity_state_file(state_file, job['entity_name']), select_fields=job['select_fields'],
+                session=session, rate_limiter=rate_limiter,
+                pii_columns=masking_plans[job['entity_name']], maskers=maskers
+            ): job['entity_name']
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            entity_name = futures[future]
+            try:
+                total_records = future.result()
+                logging.info(f"Entity '{entity_name}' finished. Total records processed: {total_records}")
+            except Exception as e:
+                failed.append(entity_name)
+                logging.critical(f"Entity '{entity_name}' failed: {e}", exc_info=True)
+                logging.critical(f"Its state is saved in '{entity_state_file(state_file, entity_name)}'. "
+                                 "Run the scheduler again to resume it.")
+
+    session.close()
+    if failed:
+        logging.critical(f"--- Multi-Entity ETL Job Finished with {len(failed)} failed entities: {', '.join(failed)} ---")
+        return 1
+    logging.info(f"--- Multi-Entity ETL Job Finished Successfully ({len(jobs)} entities) ---")
+    return 0
+
 # --- Main Execution ---
 
 def main():
-    """ Main function to orchestrate the ETL process. """
+    """ Main function to orchestrate the ETL process. Returns 0 on success, 1 on failure. """
     logging.info("--- Starting SuccessFactors to S3 ETL Job ---")
     
     config = configparser.ConfigParser()
     config.read('config.ini')
 
-    # Load config values
-    s3_bucket = config.get('AWS', 's3_bucket')
-    s3_prefix = config.get('AWS', 's3_prefix', fallback='successfactors-data')
     entity_name = config.get('SuccessFactors', 'entity_name')
+    select_fields = config.get('SuccessFactors', 'select_fields', fallback=None)
     state_file = config.get('ETL_Process', 'state_file_path')
 
-    job_state = load_job_state(state_file)
-    start_url = job_state.get('next_url') if job_state else None
-    chunk_number = job_state.get('chunk_number', 1) if job_state else 1
-    total_records = job_state.get('total_records', 0) if job_state else 0
-
     try:
+        pii_columns = load_masking_columns(config)
+        maskers = create_maskers(config) if pii_columns else None
+
         access_token = get_sf_access_token(config)
-        s3_client = boto3.client('s3')
-
-        timestamp = datetime.utcnow().strftime('%Y-%m-%d_%H-%M-%S')
-        data_generator = fetch_sf_data_in_chunks(config, access_token, start_url=start_url)
-
-        for chunk, next_url in data_generator:
-            # State should point to the NEXT chunk to be processed.
-            # Save state *before* processing to ensure we can resume if the upload fails.
-            current_state = {
-                'next_url': next_url,
-                'chunk_number': chunk_number + 1,
-                'total_records': total_records + len(chunk)
-            }
-            if next_url:
-                save_job_state(current_state, state_file)
-            else:
-                # If there's no next_url, this is the last chunk.
-                # We will clear the state file upon successful upload.
-                pass
-
-            s3_key = f"{s3_prefix}/{entity_name}/{timestamp}_part_{chunk_number:04d}.jsonl"
-            dead_letter_key = f"{s3_prefix}/{entity_name}/dead-letter/{timestamp}_part_{chunk_number:04d}.jsonl"
-            
-            upload_chunk_to_s3(s3_client, chunk, s3_bucket, s3_key, dead_letter_key)
-
-            total_records += len(chunk)
-            chunk_number += 1
-
-        # On successful completion of the entire job, clear the state file.
-        clear_job_state(state_file)
+        s3_client = get_boto3().client('s3')
+
+        total_records = run_entity_extraction(
+            config, entity_name, access_token, s3_client, state_file, select_fields=select_fields,
+            pii_columns=pii_columns, maskers=maskers
+        )
         logging.info(f"--- ETL Job Finished Successfully ---")
         logging.info(f"Total records processed: {total_records}")
+        return 0
 
     except Exception as e:
         logging.critical(f"An unrecoverable error occurred during the ETL process: {e}", exc_info=True)
         logging.critical("--- ETL Job Failed ---")
         logging.critical(f"The job state is saved in '{state_file}'. To resume, simply run the script again.")
+        return 1
 
 if __name__ == "__main__":
-    main()
-
+    parser = argparse.ArgumentParser(description="Extract SuccessFactors entities to S3.")
+    parser.add_argument('--all-entities', action='store_true',
+                        help="Run every [Entity:<name>] section from config.ini concurrently in one process.")
+    args = parser.parse_args()
+    sys.exit(main_scheduler() if args.all_entities else main())
@@ -0,0 +1,52 @@
+import subprocess
+
+import pytest
+
+from governance import cli, main_orchestrator
+from governance.src import import_budget
+
+
+@pytest.mark.parametrize('argv', [
+    ['--dry-run', 'lineage'],
+    ['lineage', '--dry-run'],
+    ['lineage', '--source', 'employees', '--dry-run'],
+])
+def test_dry_run_is_accepted_before_or_after_the_command(argv, capsys):
+    assert cli.main(argv) == 0
+    assert "[dry run] Would run 'lineage'" in capsys.readouterr().out
+
+
+def test_without_dry_run_the_command_runs(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cli, 'run_check_imports', lambda args: calls.append(args.budget_ms))
+
+    assert cli.main(['check-imports', '--budget-ms', '100']) == 0
+    assert calls == [100.0]
+
+
+def test_failed_import_with_empty_stderr_is_reported(monkeypatch):
+    monkeypatch.setattr(import_budget.subprocess, 'run',
+                        lambda *args, **kwargs: subprocess.CompletedProcess(args, returncode=3, stdout='', stderr=''))
+
+    result = import_budget.measure_import('governance.cli')
+
+    assert result['error'] == "exited with status 3"
+
+
+def test_every_governance_module_stays_within_the_import_budget(capsys):
+    # Fails if a module eagerly imports elementary, datahub or boto3, or gets slow to load.
+    within_budget = import_budget.check_import_budget()
+
+    assert within_budget, capsys.readouterr().out
+
+
+def test_report_exits_nonzero_when_the_rules_file_is_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(main_orchestrator, 'RULES_FILE_PATH', str(tmp_path / 'missing.yaml'))
+
+    assert cli.main(['report']) == 1
+
+
+def test_report_exits_nonzero_when_elementary_returns_nothing(monkeypatch):
+    monkeypatch.setattr(main_orchestrator, 'fetch_elementary_results', lambda **kwargs: [])
+
+    assert cli.main(['report']) == 1
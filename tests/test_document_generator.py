@@ -0,0 +1,59 @@
+from governance.src.document_generator import format_trend, generate_report
+
+RULES = {
+    'tables': [{
+        'name': 'employees',
+        'description': 'Employees.',
+        'columns': [
+            {'name': 'email', 'description': 'Email.', 'rules': ['Must be unique']},
+            {'name': 'first_name', 'description': 'First name.'},
+            {'name': 'salary', 'description': 'Salary.'},
+        ],
+    }],
+}
+
+RESULTS = [
+    {'table': 'employees', 'column': 'email', 'test_type': 'unique', 'status': 'FAIL', 'details': 'Duplicates.'},
+    {'table': 'employees', 'column': 'email', 'test_type': 'not_null', 'status': 'PASS', 'details': 'OK.'},
+    {'table': 'employees', 'column': 'first_name', 'test_type': 'not_null', 'status': 'PASS', 'details': 'OK.'},
+]
+
+TRENDS = {
+    ('employees', 'email', 'unique'): {'streak': 3, 'failing_since': '2026-10-03T06:00:00', 'flips': 0},
+    ('employees', 'first_name', 'not_null'): {'streak': 0, 'failing_since': None, 'flips': 4},
+}
+
+
+def table_rows(report):
+    return [line for line in report.splitlines() if line.startswith('|') and not line.startswith('|---')]
+
+
+def test_report_shows_trend_cells(tmp_path):
+    output = tmp_path / 'report.md'
+
+    generate_report(RULES, RESULTS, str(output), trends=TRENDS)
+    header, email_unique, email_not_null, first_name, salary = table_rows(output.read_text())
+
+    assert header.endswith('| Trend |')
+    assert email_unique.endswith('| Failing since 2026-10-03 (3 runs) |')
+    assert email_not_null.endswith('| — |')
+    assert first_name.endswith('| ⚠️ Flaky (4 flips) |')
+    assert salary.endswith('| No tests found for this column. | — |')
+
+
+def test_report_without_trends_has_no_trend_column(tmp_path):
+    output = tmp_path / 'report.md'
+
+    generate_report(RULES, RESULTS, str(output))
+    rows = table_rows(output.read_text())
+
+    assert 'Trend' not in rows[0]
+    assert all(row.count('|') == 6 for row in rows)
+
+
+def test_format_trend_combines_streak_and_flips():
+    trend = {'streak': 2, 'failing_since': '2026-10-01T06:00:00', 'flips': 3}
+
+    assert format_trend(trend) == "Failing since 2026-10-01 (2 runs)<br>⚠️ Flaky (3 flips)"
+    assert format_trend(None) == "—"
+    assert format_trend({'streak': 0, 'failing_since': None, 'flips': 0}) == "—"
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from governance.src.results_history import (
+    append_run,
+    get_failure_streaks,
+    get_first_failure,
+    get_flaky_tests,
+    get_trends,
+    open_history,
+)
+
+START = datetime(2026, 10, 1, 6, 0)
+
+
+def result(status, column='email', test_type='unique', day=0, invocation=None):
+    return {
+        'table': 'employees',
+        'column': column,
+        'test_type': test_type,
+        'status': status,
+        'details': '',
+        'invocation_id': invocation or f"inv-{day}",
+        'detected_at': START + timedelta(days=day),
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    conn = open_history(str(tmp_path / 'history.db'))
+    yield conn
+    conn.close()
+
+
+def test_failure_streak_starts_after_last_pass(history):
+    for day, status in enumerate(['FAIL', 'PASS', 'FAIL', 'FAIL', 'FAIL']):
+        append_run(history, [result(status, day=day)])
+
+    streak = get_failure_streaks(history)[('employees', 'email', 'unique')]
+
+    assert streak == {'streak': 3, 'failing_since': (START + timedelta(days=2)).isoformat()}
+    assert get_first_failure(history, 'employees', 'email', 'unique') == streak['failing_since']
+
+
+def test_passing_test_has_no_streak(history):
+    append_run(history, [result('FAIL', day=0)])
+    append_run(history, [result('PASS', day=1)])
+
+    assert get_failure_streaks(history) == {}
+    assert get_first_failure(history, 'employees', 'email', 'unique') is None
+
+
+def test_refetching_an_invocation_does_not_inflate_the_streak(history):
+    first_fetch = [result('FAIL', day=0), result('FAIL', day=1)]
+    second_fetch = [result('FAIL', day=1)]
+
+    assert append_run(history, first_fetch) == 2
+    assert append_run(history, second_fetch) == 0
+
+    assert get_failure_streaks(history)[('employees', 'email', 'unique')]['streak'] == 2
+
+
+def test_duplicates_within_an_invocation_keep_the_latest_result(history):
+    failed = result('FAIL', invocation='inv-0')
+    passed = dict(result('PASS', invocation='inv-0'), detected_at=START + timedelta(minutes=5))
+
+    assert append_run(history, [passed, failed]) == 1
+
+    assert get_failure_streaks(history) == {}
+
+
+def test_late_arriving_invocation_is_ordered_by_execution_time(history):
+    append_run(history, [result('FAIL', day=2)])
+    append_run(history, [result('PASS', day=1)])
+
+    streak = get_failure_streaks(history)[('employees', 'email', 'unique')]
+
+    assert streak['streak'] == 1
+    assert streak['failing_since'] == (START + timedelta(days=2)).isoformat()
+
+
+def test_flaky_tests_count_flips_within_window(history):
+    for day, status in enumerate(['PASS', 'FAIL', 'PASS', 'FAIL', 'PASS', 'PASS']):
+        append_run(history, [result(status, column='first_name', test_type='not_null', day=day),
+                             result('PASS', day=day)])
+
+    assert get_flaky_tests(history) == {('employees', 'first_name', 'not_null'): 4}
+    assert get_flaky_tests(history, window=3) == {}
+    assert get_flaky_tests(history, window=3, min_flips=1) == {('employees', 'first_name', 'not_null'): 1}
+
+
+def test_first_failure_only_searches_the_requested_test(history):
+    append_run(history, [result('FAIL', day=0), result('FAIL', column='first_name', test_type='not_null', day=0)])
+    append_run(history, [result('FAIL', day=1), result('PASS', column='first_name', test_type='not_null', day=1)])
+
+    plan = " ".join(row[3] for row in history.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM results WHERE test_id = 1 AND passed = 0"
+    ))
+
+    assert get_first_failure(history, 'employees', 'email', 'unique') == START.isoformat()
+    assert get_first_failure(history, 'employees', 'first_name', 'not_null') is None
+    assert get_first_failure(history, 'employees', 'salary', 'unique') is None
+    assert 'SEARCH' in plan and 'SCAN' not in plan
+
+
+def test_results_without_invocation_id_are_grouped_per_invocation(history):
+    columns = ['employee_id', 'first_name', 'last_name', 'email', 'salary']
+    for day in range(3):
+        status = 'FAIL' if day % 2 else 'PASS'
+        append_run(history, [
+            dict(result(status, column=column, day=day), invocation_id=None,
+                 detected_at=START + timedelta(days=day, seconds=10 * i))
+            for i, column in enumerate(columns)
+        ])
+
+    assert history.execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 3
+    assert len(get_flaky_tests(history, window=3)) == len(columns)
+
+
+def test_refetching_results_without_invocation_id_is_skipped(history):
+    fetch = [dict(result('FAIL', column=column, day=0), invocation_id=None,
+                  detected_at=START + timedelta(minutes=i)) for i, column in enumerate(['email', 'salary'])]
+
+    assert append_run(history, fetch) == 2
+    assert append_run(history, fetch) == 0
+
+
+def test_trends_combine_streaks_and_flips(history):
+    for day, status in enumerate(['FAIL', 'PASS', 'FAIL', 'FAIL']):
+        append_run(history, [result(status, day=day), result('PASS', column=None, test_type='row_count', day=day)])
+
+    trends = get_trends(history)
+
+    assert trends == {
+        ('employees', 'email', 'unique'): {
+            'streak': 2,
+            'failing_since': (START + timedelta(days=2)).isoformat(),
+            'flips': 2,
+        },
+    }
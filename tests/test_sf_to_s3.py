@@ -0,0 +1,328 @@
+import configparser
+import os
+import sys
+import time
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from operations import sf_to_s3  # noqa: E402
+
+CONFIG = """
+[SuccessFactors]
+api_base_url = https://sf.example.com
+[AWS]
+s3_bucket = bucket
+[ETL_Process]
+max_retries = 1
+backoff_factor = 0
+state_file_path = {state_file}
+[Scheduler]
+max_workers = 2
+[Entity:EmpJob]
+estimated_rows = 1000
+[Entity:User]
+estimated_rows = 10
+"""
+
+
+def test_rate_limiter_pause_blocks_every_caller():
+    limiter = sf_to_s3.RateLimiter(requests_per_second=1000)
+    limiter.pause(0.2)
+
+    start = time.monotonic()
+    limiter.acquire()
+
+    assert time.monotonic() - start >= 0.19
+
+
+def test_transient_errors_are_retried_without_importing_boto3(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'boto3', raising=False)
+    monkeypatch.setattr(sf_to_s3, 'get_boto3', lambda: pytest.fail("boto3 must not be imported"))
+    attempts = []
+
+    @sf_to_s3.retry_with_backoff(retries=3, backoff_in_seconds=0)
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise requests.exceptions.ConnectionError("reset")
+        return 'ok'
+
+    assert flaky() == 'ok'
+    assert len(attempts) == 3
+
+
+def test_other_errors_are_not_retried():
+    attempts = []
+
+    @sf_to_s3.retry_with_backoff(retries=3, backoff_in_seconds=0)
+    def broken():
+        attempts.append(1)
+        raise KeyError('access_token')
+
+    with pytest.raises(KeyError):
+        broken()
+    assert len(attempts) == 1
+
+
+@pytest.fixture
+def scheduler_config(tmp_path, monkeypatch):
+    (tmp_path / 'config.ini').write_text(CONFIG.format(state_file=tmp_path / 'job_state.json'))
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sf_to_s3, 'get_sf_access_token', lambda config: 'token')
+    monkeypatch.setattr(sf_to_s3, 'get_boto3', lambda: type('boto3', (), {'client': staticmethod(lambda name: None)}))
+
+
+def test_scheduler_returns_nonzero_when_an_entity_fails(scheduler_config, monkeypatch):
+    def run_entity_extraction(config, entity_name, *args, **kwargs):
+        if entity_name == 'User':
+            raise RuntimeError("boom")
+        return 5
+
+    monkeypatch.setattr(sf_to_s3, 'run_entity_extraction', run_entity_extraction)
+
+    assert sf_to_s3.main_scheduler() == 1
+
+
+def test_scheduler_returns_zero_when_every_entity_finishes(scheduler_config, monkeypatch):
+    monkeypatch.setattr(sf_to_s3, 'run_entity_extraction', lambda *args, **kwargs: 5)
+
+    assert sf_to_s3.main_scheduler() == 0
+
+
+def test_entity_jobs_run_largest_first_with_priority_as_tie_break():
+    config = configparser.ConfigParser()
+    config.read_string("""
+        [Entity:Small]
+        estimated_rows = 10
+        [Entity:BigLowPriority]
+        estimated_rows = 1000
+        priority = 5
+        [Entity:BigHighPriority]
+        estimated_rows = 1000
+        priority = 1
+        [Entity:Medium]
+        estimated_rows = 500
+        select_fields = userId,jobCode
+        [NotAnEntity]
+        estimated_rows = 99999
+    """)
+
+    jobs = sf_to_s3.load_entity_jobs(config)
+
+    assert [job['entity_name'] for job in jobs] == ['BigHighPriority', 'BigLowPriority', 'Medium', 'Small']
+    assert jobs[2]['select_fields'] == 'userId,jobCode'
+
+
+def fake_pages(pages, fail_after=None):
+    """Stands in for fetch_sf_data_in_chunks, yielding (records, next_url) pages."""
+    def fetch(config, access_token, start_url=None, entity_name=None, **kwargs):
+        fetch.calls.append((entity_name, start_url))
+        for number, page in enumerate(pages, start=1):
+            if fail_after is not None and number > fail_after:
+                raise RuntimeError("connection reset")
+            next_url = f"https://sf.example.com/odata/v2/{entity_name}?page={number + 1}" if number < len(pages) else None
+            yield page, next_url
+    fetch.calls = []
+    return fetch
+
+
+def test_entity_extraction_resumes_from_and_clears_its_own_state(scheduler_config, tmp_path, monkeypatch):
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    state_file = sf_to_s3.entity_state_file(str(tmp_path / 'job_state.json'), 'EmpJob')
+    sf_to_s3.save_job_state({'next_url': 'https://sf.example.com/resume', 'chunk_number': 3, 'total_records': 10},
+                            state_file)
+    fetch = fake_pages([[{'id': 1}, {'id': 2}], [{'id': 3}]])
+    uploads = []
+    monkeypatch.setattr(sf_to_s3, 'fetch_sf_data_in_chunks', fetch)
+    monkeypatch.setattr(sf_to_s3, 'upload_chunk_to_s3', lambda client, chunk, bucket, key, dead: uploads.append(key))
+
+    total = sf_to_s3.run_entity_extraction(config, 'EmpJob', 'token', None, state_file)
+
+    assert state_file.endswith('job_state.EmpJob.json')
+    assert fetch.calls == [('EmpJob', 'https://sf.example.com/resume')]
+    assert [key.rsplit('_', 1)[-1] for key in uploads] == ['0003.jsonl', '0004.jsonl']
+    assert total == 13
+    assert not os.path.exists(state_file)
+
+
+def test_failed_entity_keeps_its_state_while_others_are_cleared(scheduler_config, tmp_path, monkeypatch):
+    pages = [[{'id': 1}], [{'id': 2}], [{'id': 3}]]
+    fetchers = {'EmpJob': fake_pages(pages), 'User': fake_pages(pages, fail_after=1)}
+    monkeypatch.setattr(sf_to_s3, 'fetch_sf_data_in_chunks',
+                        lambda config, token, entity_name=None, **kwargs: fetchers[entity_name](
+                            config, token, entity_name=entity_name, **kwargs))
+    monkeypatch.setattr(sf_to_s3, 'upload_chunk_to_s3', lambda *args: None)
+
+    assert sf_to_s3.main_scheduler() == 1
+
+    state_file = str(tmp_path / 'job_state.json')
+    assert not os.path.exists(sf_to_s3.entity_state_file(state_file, 'EmpJob'))
+    user_state = sf_to_s3.load_job_state(sf_to_s3.entity_state_file(state_file, 'User'))
+    assert user_state == {'next_url': 'https://sf.example.com/odata/v2/User?page=2', 'chunk_number': 2,
+                          'total_records': 1}
+
+
+MASKING_CONFIG = """
+[Masking]
+enabled = true
+[SuccessFactors]
+entity_name = User
+rules_table = employees
+pii_field_map = first_name:firstName, last_name:lastName, email:emailAddress
+select_fields = userId,firstName,lastName,emailAddress,manager
+[Entity:User]
+rules_table = employees
+pii_field_map = first_name:firstName, last_name:lastName, email:emailAddress
+select_fields = userId,firstName,lastName,emailAddress
+[Entity:EmpJob]
+select_fields = userId,jobCode
+[Entity:EmpCompensation]
+rules_table = employees
+select_fields = userId,salary
+"""
+
+
+@pytest.fixture
+def masking_config(monkeypatch):
+    monkeypatch.setenv('PII_MASKING_KEY', 'test-secret')
+    config = configparser.ConfigParser()
+    config.read_string(MASKING_CONFIG)
+    return config
+
+
+def user():
+    return {
+        'userId': '101',
+        'firstName': 'Ann',
+        'lastName': 'Smith',
+        'emailAddress': 'ann.smith@abccorp.com',
+        'manager': {'__deferred': {'uri': 'https://sf.example.com/odata/v2/User(102)/manager'}},
+    }
+
+
+def test_masking_plan_maps_rule_columns_to_selected_source_fields(masking_config):
+    assert sf_to_s3.load_masking_columns(masking_config) == {
+        'firstName': 'hash',
+        'lastName': 'hash',
+        'emailAddress': 'mask_email',
+    }
+
+
+def test_each_entity_masks_only_its_own_selected_pii_fields(masking_config):
+    maskers = sf_to_s3.create_maskers(masking_config)
+    records = {
+        'User': [{'userId': '101', 'firstName': 'Ann', 'lastName': 'Smith', 'emailAddress': 'ann@abccorp.com'}],
+        'EmpJob': [{'userId': '101', 'jobCode': 'ENG'}],
+        'EmpCompensation': [{'userId': '101', 'salary': 90000}],
+    }
+    plans = {job['entity_name']: sf_to_s3.load_masking_columns(masking_config, f"Entity:{job['entity_name']}")
+             for job in sf_to_s3.load_entity_jobs(masking_config)}
+
+    for entity_name, chunk in records.items():
+        sf_to_s3.mask_records(chunk, plans[entity_name], maskers)
+
+    assert plans['EmpJob'] == {}
+    assert plans['EmpCompensation'] == {'salary': 'redact'}
+    assert records['User'][0]['firstName'] != 'Ann'
+    assert records['User'][0]['emailAddress'].endswith('@abccorp.com')
+    assert records['EmpJob'] == [{'userId': '101', 'jobCode': 'ENG'}]
+    assert records['EmpCompensation'] == [{'userId': '101', 'salary': None}]
+
+
+def test_pii_columns_come_from_datahub_tags(monkeypatch):
+    pii = SimpleNamespace(tags=[SimpleNamespace(tag='urn:li:tag:pii')])
+    hr = SimpleNamespace(tags=[SimpleNamespace(tag='urn:li:tag:human-resources')])
+    schema = SimpleNamespace(fields=[
+        SimpleNamespace(fieldPath='email', globalTags=pii),
+        SimpleNamespace(fieldPath='full_name', globalTags=pii),
+        SimpleNamespace(fieldPath='department_id', globalTags=hr),
+        SimpleNamespace(fieldPath='id', globalTags=None),
+    ])
+    requested = []
+
+    class DataHubGraph:
+        def __init__(self, config):
+            requested.append(config.server)
+
+        def get_aspect(self, entity_urn, aspect_type):
+            requested.append(entity_urn)
+            return schema
+
+    stub_modules = {
+        'datahub': ModuleType('datahub'),
+        'datahub.emitter': ModuleType('datahub.emitter'),
+        'datahub.emitter.mce_builder': SimpleNamespace(
+            make_dataset_urn=lambda platform, name, env: f"urn:li:dataset:({platform},{name},{env})",
+            make_tag_urn=lambda tag: f"urn:li:tag:{tag}",
+        ),
+        'datahub.ingestion': ModuleType('datahub.ingestion'),
+        'datahub.ingestion.graph': ModuleType('datahub.ingestion.graph'),
+        'datahub.ingestion.graph.client': SimpleNamespace(
+            DataHubGraph=DataHubGraph, DatahubClientConfig=lambda server: SimpleNamespace(server=server),
+        ),
+        'datahub.metadata': ModuleType('datahub.metadata'),
+        'datahub.metadata.schema_classes': SimpleNamespace(SchemaMetadataClass=object),
+    }
+    for name, module in stub_modules.items():
+        monkeypatch.setitem(sys.modules, name, module)
+
+    columns = sf_to_s3.load_pii_columns_from_datahub('http://datahub:8080', 'hr_db.employees', method='redact')
+
+    assert columns == {'email': 'redact', 'full_name': 'redact'}
+    assert requested == ['http://datahub:8080', 'urn:li:dataset:(postgres,hr_db.employees,PROD)']
+
+
+def test_masking_plan_is_empty_when_disabled():
+    assert sf_to_s3.load_masking_columns(configparser.ConfigParser()) == {}
+
+
+def test_masked_records_hide_pii_and_keep_the_email_domain(masking_config):
+    pii_columns = dict(sf_to_s3.load_masking_columns(masking_config), salary='redact')
+    record = dict(user(), salary=90000)
+
+    sf_to_s3.mask_records([record], pii_columns, sf_to_s3.create_maskers(masking_config))
+
+    assert record['userId'] == '101'
+    assert record['firstName'] != 'Ann' and len(record['firstName']) == 32
+    assert 'ann' not in record['emailAddress']
+    assert record['emailAddress'].endswith('@abccorp.com')
+    assert record['salary'] is None
+
+
+def test_masking_is_deterministic_across_runs_for_the_same_key(masking_config, monkeypatch):
+    first = sf_to_s3.create_maskers(masking_config)
+    second = sf_to_s3.create_maskers(masking_config)
+    monkeypatch.setenv('PII_MASKING_KEY', 'other-secret')
+    other_key = sf_to_s3.create_maskers(masking_config)
+
+    assert first['hash']('Ann') == second['hash']('Ann')
+    assert first['mask_email']('ann@abccorp.com') == second['mask_email']('ann@abccorp.com')
+    assert first['hash']('Ann') != other_key['hash']('Ann')
+
+
+def test_nested_values_are_hashed_instead_of_failing(masking_config):
+    maskers = sf_to_s3.create_maskers(masking_config)
+    record = user()
+
+    sf_to_s3.mask_records([record], {'manager': 'hash', 'emailAddress': 'mask_email'}, maskers)
+    sf_to_s3.mask_records([{'emailAddress': ['a@b.com']}], {'emailAddress': 'mask_email'}, maskers)
+
+    assert len(record['manager']) == 32
+
+
+def test_missing_pii_column_fails_the_chunk(masking_config):
+    maskers = sf_to_s3.create_maskers(masking_config)
+
+    with pytest.raises(ValueError, match="first_name"):
+        sf_to_s3.mask_records([user()], {'first_name': 'hash'}, maskers)
+
+
+def test_masking_requires_the_key(masking_config, monkeypatch):
+    monkeypatch.delenv('PII_MASKING_KEY')
+
+    with pytest.raises(ValueError, match="PII_MASKING_KEY"):
+        sf_to_s3.create_maskers(masking_config)